@@ -0,0 +1,67 @@
+/**
+ * 941 Analytics globe border worker
+ * Fetches the world topology and turns every country outline into line-segment
+ * vertices on the globe shell, off the main thread. The vertex buffer is transferred
+ * back, not copied.
+ *
+ * Message in:  { url, radius }
+ * Message out: { positions: Float32Array } or { error: string }
+ */
+importScripts('https://unpkg.com/topojson-client@3');
+
+const DEG = Math.PI / 180;
+
+// Write the point at (lat, lon) on a sphere of radius r into out[off..off+2]
+function latLonWrite(out, off, lat, lon, r) {
+    const phi = (90 - lat) * DEG;
+    const theta = (lon + 180) * DEG;
+    const sinPhi = Math.sin(phi);
+    out[off] = -r * sinPhi * Math.cos(theta);
+    out[off + 1] = r * Math.cos(phi);
+    out[off + 2] = r * sinPhi * Math.sin(theta);
+}
+
+// Every polygon ring as consecutive [start, end] vertex pairs for THREE.LineSegments
+function borderPositions(features, radius) {
+    const rings = [];
+    for (const feature of features) {
+        const { type, coordinates } = feature.geometry;
+        if (type === 'Polygon') {
+            rings.push(...coordinates);
+        } else if (type === 'MultiPolygon') {
+            for (const polygon of coordinates) rings.push(...polygon);
+        }
+    }
+
+    let segments = 0;
+    for (const ring of rings) if (ring.length > 1) segments += ring.length - 1;
+
+    const verts = new Float32Array(segments * 6);
+    let k = 0;
+    for (const ring of rings) {
+        if (ring.length < 2) continue;
+        for (let i = 0; i < ring.length; i++) {
+            latLonWrite(verts, k, ring[i][1], ring[i][0], radius);
+            k += 3;
+            // Interior points end one segment and start the next
+            if (i > 0 && i < ring.length - 1) {
+                verts.copyWithin(k, k - 3, k);
+                k += 3;
+            }
+        }
+    }
+    return verts;
+}
+
+self.onmessage = async (e) => {
+    const { url, radius } = e.data;
+    try {
+        const response = await fetch(url);
+        const topology = await response.json();
+        const countries = topojson.feature(topology, topology.objects.countries);
+        const positions = borderPositions(countries.features, radius);
+        self.postMessage({ positions }, [positions.buffer]);
+    } catch (err) {
+        self.postMessage({ error: String(err) });
+    }
+};
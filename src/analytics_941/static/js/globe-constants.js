@@ -0,0 +1,119 @@
+/**
+ * 941 Analytics globe lookup tables
+ * Static coordinates and names used by the dashboard globe. Served with long-lived
+ * cache headers and versioned by content hash, so browsers fetch it once. The tables
+ * are frozen: they are shared read-only lookups.
+ */
+
+// Country centroids (lat, lon)
+export const COUNTRY_COORDS = Object.freeze({
+    'US': [39.8, -98.5], 'CN': [35.0, 105.0], 'CA': [56.0, -106.0], 'SG': [1.35, 103.8],
+    'PT': [39.5, -8.0], 'DE': [51.0, 10.5], 'VN': [16.0, 108.0], 'PK': [30.0, 70.0],
+    'GB': [54.0, -2.0], 'FR': [46.0, 2.0], 'JP': [36.0, 138.0], 'IN': [22.0, 78.0],
+    'BR': [-10.0, -55.0], 'AU': [-25.0, 135.0], 'KR': [36.0, 128.0], 'NL': [52.0, 5.0],
+    'IT': [42.0, 12.0], 'ES': [40.0, -4.0], 'CH': [47.0, 8.0], 'SE': [62.0, 15.0],
+    'NO': [62.0, 10.0], 'DK': [56.0, 10.0], 'FI': [64.0, 26.0], 'IE': [53.0, -8.0],
+    'RU': [60.0, 100.0], 'MX': [23.0, -102.0], 'AR': [-34.0, -64.0], 'CL': [-33.0, -71.0],
+    'CO': [4.0, -72.0], 'PE': [-10.0, -76.0], 'EG': [27.0, 30.0], 'NG': [10.0, 8.0],
+    'ZA': [-29.0, 24.0], 'SA': [24.0, 45.0], 'AE': [24.0, 54.0], 'IL': [31.0, 35.0],
+    'TR': [39.0, 35.0], 'PL': [52.0, 20.0], 'UA': [49.0, 32.0], 'CZ': [50.0, 15.0],
+    'HK': [22.3, 114.2], 'TW': [24.0, 121.0], 'MY': [4.0, 109.0], 'TH': [15.0, 101.0],
+    'ID': [-2.0, 118.0], 'PH': [13.0, 122.0], 'NZ': [-42.0, 174.0], 'AT': [47.5, 14.5],
+    'BE': [50.8, 4.5], 'GR': [39.0, 22.0], 'HU': [47.0, 20.0], 'RO': [46.0, 25.0],
+    'BD': [24.0, 90.0], 'KE': [-1.0, 38.0]
+});
+
+// Colours are hex numbers, which three.js takes without parsing a CSS string.
+// Transparency is set by each material's opacity.
+export const CONFIG = Object.freeze({
+    globeRadius: 100,
+    backgroundColor: 0x000000,
+    oceanColor: 0x0a0a0a,
+    borderColor: 0xffffff,
+    pointColor: 0xffffff,
+    atmosphereColor: 0xffffff,
+    animationDuration: 800,
+    countriesUrl: 'https://unpkg.com/world-atlas@2.0.2/countries-110m.json'
+});
+
+// Country names lookup
+export const COUNTRY_NAMES = Object.freeze({
+    'US': 'United States', 'CN': 'China', 'CA': 'Canada', 'SG': 'Singapore',
+    'PT': 'Portugal', 'DE': 'Germany', 'VN': 'Vietnam', 'PK': 'Pakistan',
+    'GB': 'United Kingdom', 'FR': 'France', 'JP': 'Japan', 'IN': 'India',
+    'BR': 'Brazil', 'AU': 'Australia', 'KR': 'South Korea', 'NL': 'Netherlands',
+    'IT': 'Italy', 'ES': 'Spain', 'CH': 'Switzerland', 'SE': 'Sweden',
+    'NO': 'Norway', 'DK': 'Denmark', 'FI': 'Finland', 'IE': 'Ireland',
+    'RU': 'Russia', 'MX': 'Mexico', 'AR': 'Argentina', 'CL': 'Chile',
+    'CO': 'Colombia', 'PE': 'Peru', 'EG': 'Egypt', 'NG': 'Nigeria',
+    'ZA': 'South Africa', 'SA': 'Saudi Arabia', 'AE': 'UAE', 'IL': 'Israel',
+    'TR': 'Turkey', 'PL': 'Poland', 'UA': 'Ukraine', 'CZ': 'Czech Republic',
+    'HK': 'Hong Kong', 'TW': 'Taiwan', 'MY': 'Malaysia', 'TH': 'Thailand',
+    'ID': 'Indonesia', 'PH': 'Philippines', 'NZ': 'New Zealand', 'AT': 'Austria',
+    'BE': 'Belgium', 'GR': 'Greece', 'HU': 'Hungary', 'RO': 'Romania',
+    'BD': 'Bangladesh', 'KE': 'Kenya'
+});
+
+// US State centroids (lat, lon) for drill-down
+export const US_STATE_COORDS = Object.freeze({
+    'AL': [32.7, -86.7], 'AK': [64.0, -153.0], 'AZ': [34.3, -111.7], 'AR': [34.9, -92.4],
+    'CA': [37.2, -119.4], 'CO': [39.0, -105.5], 'CT': [41.6, -72.7], 'DE': [39.0, -75.5],
+    'FL': [28.6, -82.4], 'GA': [32.6, -83.4], 'HI': [20.8, -156.3], 'ID': [44.4, -114.6],
+    'IL': [40.0, -89.2], 'IN': [40.0, -86.3], 'IA': [42.0, -93.5], 'KS': [38.5, -98.4],
+    'KY': [37.8, -85.7], 'LA': [31.1, -92.0], 'ME': [45.4, -69.2], 'MD': [39.0, -76.8],
+    'MA': [42.2, -71.5], 'MI': [44.2, -85.4], 'MN': [46.3, -94.2], 'MS': [32.7, -89.7],
+    'MO': [38.4, -92.5], 'MT': [47.0, -109.6], 'NE': [41.5, -99.8], 'NV': [39.3, -116.6],
+    'NH': [43.7, -71.6], 'NJ': [40.1, -74.7], 'NM': [34.4, -106.1], 'NY': [42.9, -75.5],
+    'NC': [35.5, -79.4], 'ND': [47.4, -100.5], 'OH': [40.4, -82.8], 'OK': [35.6, -97.5],
+    'OR': [44.0, -120.5], 'PA': [40.9, -77.8], 'RI': [41.7, -71.5], 'SC': [33.9, -80.9],
+    'SD': [44.4, -100.2], 'TN': [35.8, -86.3], 'TX': [31.5, -99.4], 'UT': [39.3, -111.7],
+    'VT': [44.1, -72.7], 'VA': [37.5, -78.8], 'WA': [47.4, -120.5], 'WV': [38.9, -80.5],
+    'WI': [44.6, -89.8], 'WY': [43.0, -107.5], 'DC': [38.9, -77.0]
+});
+
+// US State names lookup
+export const US_STATE_NAMES = Object.freeze({
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas',
+    'CA': 'California', 'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware',
+    'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho',
+    'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas',
+    'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland',
+    'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi',
+    'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
+    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
+    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma',
+    'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina',
+    'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah',
+    'VT': 'Vermont', 'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia',
+    'WI': 'Wisconsin', 'WY': 'Wyoming', 'DC': 'Washington DC'
+});
+
+
+// City coordinates (approximate) for major cities worldwide
+export const CITY_COORDS = Object.freeze({
+    // US Cities
+    'New York|NY|US': [40.71, -74.01], 'Los Angeles|CA|US': [34.05, -118.24],
+    'Chicago|IL|US': [41.88, -87.63], 'Houston|TX|US': [29.76, -95.37],
+    'Phoenix|AZ|US': [33.45, -112.07], 'San Francisco|CA|US': [37.77, -122.42],
+    'Seattle|WA|US': [47.61, -122.33], 'Miami|FL|US': [25.76, -80.19],
+    'Boston|MA|US': [42.36, -71.06], 'Denver|CO|US': [39.74, -104.99],
+    'Atlanta|GA|US': [33.75, -84.39], 'Dallas|TX|US': [32.78, -96.80],
+    'Austin|TX|US': [30.27, -97.74], 'San Diego|CA|US': [32.72, -117.16],
+    'Portland|OR|US': [45.52, -122.68], 'Las Vegas|NV|US': [36.17, -115.14],
+    // International Cities
+    'London||GB': [51.51, -0.13], 'Manchester||GB': [53.48, -2.24],
+    'Toronto|ON|CA': [43.65, -79.38], 'Vancouver|BC|CA': [49.28, -123.12],
+    'Montreal|QC|CA': [45.50, -73.57], 'Sydney|NSW|AU': [-33.87, 151.21],
+    'Melbourne|VIC|AU': [-37.81, 144.96], 'Berlin||DE': [52.52, 13.41],
+    'Munich||DE': [48.14, 11.58], 'Frankfurt||DE': [50.11, 8.68],
+    'Paris||FR': [48.86, 2.35], 'Lyon||FR': [45.76, 4.83],
+    'Tokyo||JP': [35.68, 139.65], 'Osaka||JP': [34.69, 135.50],
+    'Singapore||SG': [1.35, 103.82], 'Mumbai||IN': [19.08, 72.88],
+    'Delhi||IN': [28.70, 77.10], 'Bangalore||IN': [12.97, 77.59],
+    'Seoul||KR': [37.57, 126.98], 'Amsterdam||NL': [52.37, 4.90],
+    'Stockholm||SE': [59.33, 18.07], 'Dublin||IE': [53.35, -6.26],
+    'Zurich||CH': [47.38, 8.54], 'Madrid||ES': [40.42, -3.70],
+    'Barcelona||ES': [41.39, 2.17], 'Rome||IT': [41.90, 12.50],
+    'Milan||IT': [45.46, 9.19], 'Sao Paulo||BR': [-23.55, -46.63],
+    'Mexico City||MX': [19.43, -99.13], 'Hong Kong||HK': [22.32, 114.17]
+});
@@ -0,0 +1,1166 @@
+/**
+ * 941 Analytics dashboard globe
+ * Three.js globe of visitors by country, with drill-down to states and cities. The
+ * page embeds its data as JSON in #globe-data; this module is static, so it is served
+ * with long-lived cache headers and versioned by content hash.
+ */
+import * as THREE from 'three';
+import { OrbitControls } from 'three/addons/controls/OrbitControls.js';
+import { acceleratedRaycast, computeBoundsTree } from 'three-mesh-bvh';
+import {
+    CONFIG, COUNTRY_COORDS, COUNTRY_NAMES, US_STATE_COORDS, US_STATE_NAMES, CITY_COORDS
+} from './globe-constants.js';
+
+// Visitor data embedded in the page by the dashboard route
+const PAGE_DATA = JSON.parse(document.getElementById('globe-data').textContent);
+const globeData = PAGE_DATA.countries.map(([country, views]) => ({ country, views }));
+
+// Unpack rows packed by _pack_geo_rows: a columnar little-endian blob of typed
+// arrays plus a shared string table, read through views on one buffer
+function decodeGeoRows(b64, stringFields) {
+    const bytes = Uint8Array.from(atob(b64), ch => ch.charCodeAt(0));
+    const [n, strLen] = new Uint32Array(bytes.buffer, 0, 2);
+    const strings = new TextDecoder().decode(bytes.subarray(8, 8 + strLen)).split('\0');
+    let offset = 8 + Math.ceil(strLen / 4) * 4;
+    const lat = new Float32Array(bytes.buffer, offset, n);
+    const lon = new Float32Array(bytes.buffer, offset += n * 4, n);
+    const views = new Uint32Array(bytes.buffer, offset += n * 4, n);
+    const stringIdx = new Uint16Array(bytes.buffer, offset += n * 4, n * stringFields.length);
+
+    const rows = new Array(n);
+    for (let i = 0; i < n; i++) {
+        const row = { views: views[i], lat: lat[i], lon: lon[i] };
+        for (let f = 0; f < stringFields.length; f++) {
+            row[stringFields[f]] = strings[stringIdx[f * n + i]];
+        }
+        rows[i] = row;
+    }
+    return rows;
+}
+
+const regionData = decodeGeoRows(PAGE_DATA.regions, ['country', 'region']);
+const cityData = decodeGeoRows(PAGE_DATA.cities, ['country', 'region', 'city']);
+
+// Reverse lookup: state name -> code (Cloudflare returns full names like "California")
+// Keyed by state code and by lowercased full name
+const STATE_NAME_TO_CODE = new Map();
+for (const code in US_STATE_NAMES) {
+    STATE_NAME_TO_CODE.set(code, code);
+    STATE_NAME_TO_CODE.set(US_STATE_NAMES[code].toLowerCase(), code);
+}
+
+// Helper to normalize state identifier to code, memoized per distinct input
+const stateCodeCache = new Map();
+function normalizeStateCode(region) {
+    if (!region) return null;
+    const cached = stateCodeCache.get(region);
+    if (cached !== undefined) return cached;
+    // Codes ("CA") hit directly; full names ("California") hit on the lowercased key
+    const code = STATE_NAME_TO_CODE.get(region) ?? STATE_NAME_TO_CODE.get(region.toLowerCase()) ?? null;
+    stateCodeCache.set(region, code);
+    return code;
+}
+
+// Drill-down indexes, built once so each click is a lookup instead of a scan.
+// Each row also caches log10(views + 1) for marker sizing.
+for (const r of regionData) r._logViews = Math.log10(r.views + 1);
+const usRegions = regionData.filter(r => r.country === 'US');
+const citiesByCountry = {};
+const citiesByState = {};
+for (const c of cityData) {
+    c._logViews = Math.log10(c.views + 1);
+    (citiesByCountry[c.country] ||= []).push(c);
+    if (c.country === 'US') {
+        const stateCode = normalizeStateCode(c.region);
+        if (stateCode) (citiesByState[stateCode] ||= []).push(c);
+    }
+}
+
+// Largest log-scaled view count of a group, stored on the group array itself.
+// Floored at log10(2) so a group of single views still sizes sensibly.
+const LOG_MAX = Symbol('logMax');
+function setLogMax(rows) {
+    let logMax = Math.log10(2);
+    for (const r of rows) if (r._logViews > logMax) logMax = r._logViews;
+    rows[LOG_MAX] = logMax;
+}
+// Groups are also ordered by views once here, so the marker caps (.slice) and the
+// detail panel lists always keep the busiest entries whatever order rows arrive in.
+function finishGroup(rows) {
+    setLogMax(rows);
+    rows.sort((a, b) => b.views - a.views);
+}
+finishGroup(usRegions);
+Object.values(citiesByCountry).forEach(finishGroup);
+Object.values(citiesByState).forEach(finishGroup);
+
+// The coordinate tables above, packed once into a key -> slot Map plus one
+// Float32Array of interleaved lat/lon, so lookups don't touch per-entry arrays.
+function packCoords(coords) {
+    const index = new Map();
+    const latLon = new Float32Array(Object.keys(coords).length * 2);
+    let i = 0;
+    for (const key in coords) {
+        index.set(key, i);
+        latLon[i] = coords[key][0];
+        latLon[i + 1] = coords[key][1];
+        i += 2;
+    }
+    return { index, latLon };
+}
+
+const COUNTRY_LL = packCoords(COUNTRY_COORDS);
+const US_STATE_LL = packCoords(US_STATE_COORDS);
+const CITY_LL = packCoords(CITY_COORDS);
+
+// Offset of `key`'s latitude in table.latLon (longitude follows), or -1
+function coordSlot(table, key) {
+    const i = table.index.get(key);
+    return i === undefined ? -1 : i;
+}
+
+const DEG = Math.PI / 180;
+
+// Write the point at (lat, lon) on a sphere of radius r into out[off..off+2]
+function latLonWrite(out, off, lat, lon, r) {
+    const phi = (90 - lat) * DEG;
+    const theta = (lon + 180) * DEG;
+    const sinPhi = Math.sin(phi);
+    out[off] = -r * sinPhi * Math.cos(theta);
+    out[off + 1] = r * Math.cos(phi);
+    out[off + 2] = r * sinPhi * Math.sin(theta);
+}
+
+// Marker positions on the globe shell, computed once per data row. Each row's
+// [x, y, z] starts at row._at in the returned array (-1 when it has no coordinates).
+// `fallback(row, out)` writes [lat, lon] for rows without MaxMind lat/lon.
+function shellPositions(rows, fallback) {
+    const xyz = new Float32Array(rows.length * 3);
+    const latLon = [0, 0];
+    rows.forEach((row, i) => {
+        if (row.lat && row.lon) {
+            latLon[0] = row.lat;
+            latLon[1] = row.lon;
+        } else if (!fallback(row, latLon)) {
+            row._at = -1;
+            return;
+        }
+        row._at = i * 3;
+        latLonWrite(xyz, i * 3, latLon[0], latLon[1], CONFIG.globeRadius + 1);
+    });
+    return xyz;
+}
+
+// Copy [lat, lon] at `at` in a packed table into `out`, plus an optional offset
+function readLatLon(table, at, out, dLat = 0, dLon = 0) {
+    if (at < 0) return false;
+    out[0] = table.latLon[at] + dLat;
+    out[1] = table.latLon[at + 1] + dLon;
+    return true;
+}
+
+const GLOBE_XYZ = shellPositions(globeData, (item, out) =>
+    readLatLon(COUNTRY_LL, coordSlot(COUNTRY_LL, item.country), out));
+
+// US states fall back to the hardcoded state centroid
+const REGION_XYZ = shellPositions(regionData, (item, out) =>
+    readLatLon(US_STATE_LL, coordSlot(US_STATE_LL, normalizeStateCode(item.region)), out));
+
+// 32-bit FNV-1a hash of a string
+function hashString(s) {
+    let h = 2166136261;
+    for (let i = 0; i < s.length; i++) h = Math.imul(h ^ s.charCodeAt(i), 16777619);
+    return h >>> 0;
+}
+
+// Map 16 bits of a hash to an offset in [-spread / 2, spread / 2]
+function hashOffset(bits, spread) {
+    return ((bits & 0xffff) / 0xffff - 0.5) * spread;
+}
+
+// US cities fall back to a small offset from their state's centre; elsewhere to the
+// hardcoded city table (with, then without, region), then an offset from the country.
+// Offsets are derived from the city's name, so a city keeps its spot across reloads.
+const CITY_XYZ = shellPositions(cityData, (item, out) => {
+    const key = `${item.city}|${item.region || ''}|${item.country}`;
+    const h = hashString(key);
+    if (item.country === 'US') {
+        const at = coordSlot(US_STATE_LL, normalizeStateCode(item.region));
+        return readLatLon(US_STATE_LL, at, out, hashOffset(h, 2), hashOffset(h >>> 16, 2));
+    }
+    let at = coordSlot(CITY_LL, key);
+    if (at < 0) at = coordSlot(CITY_LL, `${item.city}||${item.country}`);
+    if (at >= 0) return readLatLon(CITY_LL, at, out);
+    const offset = hashOffset(h, 8);
+    return readLatLon(COUNTRY_LL, coordSlot(COUNTRY_LL, item.country), out, offset, offset);
+});
+
+// Fullscreen mode state
+let isFullscreen = false;
+let originalContainer = null;  // Store original container for restoring
+
+let isAnimating = false;
+let currentView = 'world';
+let selectedCountry = null;
+
+let scene, camera, renderer, controls, globeGroup;
+let countryLayer = null;  // World-view country markers
+let tooltip;
+let glowTexture;  // Shared by every marker glow; created once in initGlobe
+
+// Frames are drawn on demand: anything that changes the picture calls requestRender
+let needsRender = true;
+function requestRender() {
+    needsRender = true;
+}
+
+// Scratch objects reused by pointer picking and camera animations
+const raycaster = new THREE.Raycaster();
+raycaster.firstHitOnly = true;  // Honoured by the BVH raycast: stop at the nearest triangle
+const mouse = new THREE.Vector2();
+const _cameraFrom = new THREE.Vector3();
+const _cameraTo = new THREE.Vector3();
+
+function latLonToVector3(lat, lon, radius = CONFIG.globeRadius, out = new THREE.Vector3()) {
+    const phi = (90 - lat) * DEG;
+    const theta = (lon + 180) * DEG;
+    const sinPhi = Math.sin(phi);
+    return out.set(-radius * sinPhi * Math.cos(theta), radius * Math.cos(phi), radius * sinPhi * Math.sin(theta));
+}
+
+function createGlowTexture() {
+    const canvas = document.createElement('canvas');
+    canvas.width = 64;
+    canvas.height = 64;
+    const ctx = canvas.getContext('2d');
+    const gradient = ctx.createRadialGradient(32, 32, 0, 32, 32, 32);
+    gradient.addColorStop(0, 'rgba(255, 255, 255, 1)');
+    gradient.addColorStop(0.3, 'rgba(255, 255, 255, 0.5)');
+    gradient.addColorStop(1, 'rgba(255, 255, 255, 0)');
+    ctx.fillStyle = gradient;
+    ctx.fillRect(0, 0, 64, 64);
+    const texture = new THREE.CanvasTexture(canvas);
+    // Glow points stay within a narrow size range, so mip levels aren't worth the
+    // extra upload and memory
+    texture.generateMipmaps = false;
+    texture.minFilter = THREE.LinearFilter;
+    return texture;
+}
+
+function easeInOutCubic(t) {
+    return t < 0.5 ? 4 * t * t * t : 1 - Math.pow(-2 * t + 2, 3) / 2;
+}
+
+// The one camera animation in flight (isAnimating guards against overlap). It is
+// stepped from the render loop, moving the camera from _cameraFrom to _cameraTo,
+// with optional callbacks at the halfway point and at the end.
+let cameraAnimStart = 0;
+let cameraAnimHalfway = null;
+let cameraAnimDone = null;
+
+function startCameraAnimation(onHalfway, onDone) {
+    // Already (nearly) there: snap instead of spending a full animation on no movement
+    if (camera.position.distanceToSquared(_cameraTo) < 1) {
+        camera.position.copy(_cameraTo);
+        camera.lookAt(0, 0, 0);
+        requestRender();
+        if (onHalfway) onHalfway();
+        if (onDone) onDone();
+        return;
+    }
+    isAnimating = true;
+    _cameraFrom.copy(camera.position);
+    cameraAnimStart = performance.now();
+    cameraAnimHalfway = onHalfway;
+    cameraAnimDone = onDone;
+}
+
+function stepCameraAnimation() {
+    if (!isAnimating) return;
+    const t = Math.min((performance.now() - cameraAnimStart) / CONFIG.animationDuration, 1);
+
+    camera.position.lerpVectors(_cameraFrom, _cameraTo, easeInOutCubic(t));
+    camera.lookAt(0, 0, 0);
+
+    if (t >= 0.5 && cameraAnimHalfway) {
+        const onHalfway = cameraAnimHalfway;
+        cameraAnimHalfway = null;
+        onHalfway();
+    }
+    if (t === 1) {
+        isAnimating = false;
+        if (cameraAnimDone) cameraAnimDone();
+    }
+}
+
+function animateCameraTo(lat, lon, distance = 180, onHalfway = null) {
+    if (isAnimating) {
+        if (onHalfway) onHalfway();
+        return;
+    }
+    controls.autoRotate = false;
+
+    latLonToVector3(lat, lon, distance + CONFIG.globeRadius, _cameraTo);
+    startCameraAnimation(onHalfway, null);
+}
+
+function finishCameraToWorld() {
+    controls.autoRotate = true;
+    currentView = 'world';
+    selectedCountry = null;
+    updateDetailPanel(null);
+}
+
+function animateCameraToWorld() {
+    if (isAnimating) return;
+
+    // Clear all drill-down markers when returning to world view
+    clearStateMarkers();
+    clearCityMarkers();
+
+    // Show all country markers again
+    showAllCountryMarkers();
+
+    _cameraTo.set(0, 0, 280);
+    startCameraAnimation(null, finishCameraToWorld);
+}
+
+// Markers share one unit sphere; each layer (countries, states, cities) is a single
+// InstancedMesh (one draw call) with per-instance position and scale. Markers are a
+// few pixels across, so a once-subdivided icosahedron (80 evenly sized triangles) is
+// indistinguishable from a finely tessellated sphere.
+const SHARED_SPHERE_GEO = new THREE.IcosahedronGeometry(1, 1);
+
+// Hover raycasts test the shared sphere once per instance; a BVH over it (built
+// once, reused by every layer) replaces the per-triangle scan. InstancedMesh
+// raycasts each instance through Mesh.prototype.raycast, so patching that is enough.
+THREE.BufferGeometry.prototype.computeBoundsTree = computeBoundsTree;
+THREE.Mesh.prototype.raycast = acceleratedRaycast;
+SHARED_SPHERE_GEO.computeBoundsTree();
+const SHARED_MARKER_MAT = new THREE.MeshBasicMaterial({ color: CONFIG.pointColor, transparent: true, opacity: 0.95 });
+
+// Globe materials, each shared by every mesh or line that uses it
+const OCEAN_MAT = new THREE.MeshBasicMaterial({ color: CONFIG.oceanColor, transparent: true, opacity: 0.95 });
+const ATMOSPHERE_MAT = new THREE.MeshBasicMaterial({
+    color: CONFIG.atmosphereColor, transparent: true, opacity: 0.08, side: THREE.BackSide
+});
+const BORDER_MAT = new THREE.LineBasicMaterial({ color: CONFIG.borderColor, transparent: true, opacity: 0.3 });
+const COUNTRY_MARKER_MAT = new THREE.MeshBasicMaterial({ color: CONFIG.pointColor, transparent: true, opacity: 0.9 });
+
+// Marker glows are one THREE.Points cloud per layer. Each point carries its glow
+// diameter in world units; the vertex shader projects that to pixels the way a
+// Sprite of the same scale would appear (projectionMatrix[1][1] = 1 / tan(fov / 2)).
+const GLOW_VERTEX_SHADER = `
+    attribute float size;
+    uniform float halfHeight;
+    void main() {
+        vec4 mvPosition = modelViewMatrix * vec4(position, 1.0);
+        gl_PointSize = size * projectionMatrix[1][1] * halfHeight / -mvPosition.z;
+        gl_Position = projectionMatrix * mvPosition;
+    }`;
+const GLOW_FRAGMENT_SHADER = `
+    uniform sampler2D map;
+    uniform vec3 color;
+    uniform float opacity;
+    void main() {
+        gl_FragColor = vec4(color, opacity) * texture2D(map, gl_PointCoord);
+    }`;
+const glowHalfHeight = { value: 1 };  // Drawing buffer height / 2, set every frame
+
+function createGlowMaterial(opacity) {
+    return new THREE.ShaderMaterial({
+        uniforms: {
+            map: { value: glowTexture },
+            color: { value: new THREE.Color(CONFIG.pointColor) },
+            opacity: { value: opacity },
+            halfHeight: glowHalfHeight
+        },
+        vertexShader: GLOW_VERTEX_SHADER,
+        fragmentShader: GLOW_FRAGMENT_SHADER,
+        transparent: true,
+        blending: THREE.AdditiveBlending
+    });
+}
+
+const _instanceMatrix = new THREE.Matrix4();
+const _instancePosition = new THREE.Vector3();
+const _instanceScale = new THREE.Vector3();
+const _noRotation = new THREE.Quaternion();
+
+// Build one marker layer from [{ xyz, at, size, data }], where xyz[at..at+2] is the
+// marker's precomputed position. Only markers facing the camera and not hidden are
+// drawn (see cullMarkerLayer); a raycast hit's instanceId maps through
+// mesh.userData.slots to the marker's index in mesh.userData.markers.
+function addMarkerLayer(markers, glowOpacity, material = SHARED_MARKER_MAT, glowScale = 3) {
+    if (markers.length === 0) return null;
+
+    const mesh = new THREE.InstancedMesh(SHARED_SPHERE_GEO, material, markers.length);
+    const glowPositions = new Float32Array(markers.length * 3);
+    const glowSizes = new Float32Array(markers.length);
+    markers.forEach((m, i) => {
+        _instancePosition.fromArray(m.xyz, m.at);
+        _instanceMatrix.compose(_instancePosition, _noRotation, _instanceScale.setScalar(m.size));
+        mesh.setMatrixAt(i, _instanceMatrix);
+        _instancePosition.toArray(glowPositions, i * 3);
+        glowSizes[i] = m.size * glowScale;
+    });
+    mesh.userData.markers = markers.map(m => m.data);
+    mesh.userData.slots = Uint16Array.from(markers, (m, i) => i);
+
+    const glowGeo = new THREE.BufferGeometry();
+    glowGeo.setAttribute('position', new THREE.BufferAttribute(glowPositions.slice(), 3));
+    glowGeo.setAttribute('size', new THREE.BufferAttribute(glowSizes.slice(), 1));
+    const glow = new THREE.Points(glowGeo, createGlowMaterial(glowOpacity));
+
+    // Bounds cover every marker, so they stay valid as culling shrinks what's drawn
+    mesh.computeBoundingSphere();
+    glowGeo.computeBoundingSphere();
+    globeGroup.add(mesh);
+    globeGroup.add(glow);
+
+    const layer = {
+        mesh,
+        glow,
+        hitIndex: buildHitIndex(markers),
+        // Unculled per-marker data, copied into the drawn buffers by cullMarkerLayer
+        matrices: mesh.instanceMatrix.array.slice(),
+        glowPositions,
+        glowSizes,
+        hidden: new Uint8Array(markers.length)  // Set per marker to keep it off screen
+    };
+    cullMarkerLayer(layer);
+    return layer;
+}
+
+const _cameraDir = new THREE.Vector3();
+
+// Pack the instances and glow points of markers on the camera's side of the globe
+// to the front of their buffers and draw only those. Anything past the plane
+// through the globe centre facing the camera is hidden by the globe anyway.
+function cullMarkerLayer(layer) {
+    if (!layer) return;
+    const { mesh, glow, matrices, glowPositions, glowSizes, hidden } = layer;
+    const dirs = layer.hitIndex.dirs;
+    const slots = mesh.userData.slots;
+    const instances = mesh.instanceMatrix.array;
+    const positionAttr = glow.geometry.attributes.position;
+    const sizeAttr = glow.geometry.attributes.size;
+    _cameraDir.copy(camera.position).normalize();
+
+    // Invariant: instance k and glow point k belong to marker slots[k]
+    let count = 0;
+    let moved = false;
+    for (let i = 0; i < hidden.length; i++) {
+        const shown = !hidden[i] &&
+            dirs[i * 3] * _cameraDir.x + dirs[i * 3 + 1] * _cameraDir.y + dirs[i * 3 + 2] * _cameraDir.z >= 0;
+        if (!shown) continue;
+        if (slots[count] !== i) {
+            instances.set(matrices.subarray(i * 16, i * 16 + 16), count * 16);
+            positionAttr.array.set(glowPositions.subarray(i * 3, i * 3 + 3), count * 3);
+            sizeAttr.array[count] = glowSizes[i];
+            slots[count] = i;
+            moved = true;
+        }
+        count++;
+    }
+    mesh.count = count;
+    glow.geometry.setDrawRange(0, count);
+    if (moved) {
+        mesh.instanceMatrix.needsUpdate = true;
+        positionAttr.needsUpdate = true;
+        sizeAttr.needsUpdate = true;
+    }
+    requestRender();
+}
+
+function cullMarkerLayers() {
+    cullMarkerLayer(countryLayer);
+    cullMarkerLayer(stateLayer);
+    cullMarkerLayer(cityLayer);
+}
+
+// Remove a layer and free its GPU buffers. The sphere geometry, marker materials
+// and glow texture are shared across layers and stay alive.
+function removeMarkerLayer(layer) {
+    if (!layer) return;
+    globeGroup.remove(layer.mesh);
+    globeGroup.remove(layer.glow);
+    layer.mesh.dispose();
+    layer.glow.geometry.dispose();
+    layer.glow.material.dispose();
+    requestRender();
+}
+
+const _hits = [];  // Reused as the raycaster's result array
+
+// Nearest raycaster hit on a marker layer's mesh, or null
+function nearestHit(layer) {
+    if (!layer) return null;
+    _hits.length = 0;
+    raycaster.intersectObject(layer.mesh, false, _hits);
+    return _hits.length > 0 ? _hits[0] : null;
+}
+
+// Data for the marker hit by a raycast against a marker layer
+function markerDataAt(hit) {
+    const { markers, slots } = hit.object.userData;
+    return markers[slots[hit.instanceId]];
+}
+
+// Flat hit index over [{ xyz, at, size, data }]: a unit direction and the cosine
+// of the angular radius per marker, packed in typed arrays. All markers sit on one
+// shell around the globe centre, so a click is resolved by intersecting the ray
+// with that shell analytically and comparing directions, with no mesh raycasts.
+function buildHitIndex(markers) {
+    const dirs = new Float32Array(markers.length * 3);
+    const minCos = new Float32Array(markers.length);
+    let shellRadius = CONFIG.globeRadius + 1;
+    markers.forEach((m, i) => {
+        const x = m.xyz[m.at], y = m.xyz[m.at + 1], z = m.xyz[m.at + 2];
+        shellRadius = Math.sqrt(x * x + y * y + z * z);
+        dirs[i * 3] = x / shellRadius;
+        dirs[i * 3 + 1] = y / shellRadius;
+        dirs[i * 3 + 2] = z / shellRadius;
+        minCos[i] = Math.cos(m.size / shellRadius);
+    });
+    return { dirs, minCos, shellRadius, data: markers.map(m => m.data) };
+}
+
+const _shellHit = new THREE.Vector3();
+
+// Data of the marker under `ray`, or null. `accept(data, i)` can veto candidates (e.g. hidden markers).
+function pickMarker(index, ray, accept = null) {
+    if (!index) return null;
+    const { dirs, minCos, shellRadius, data } = index;
+
+    // Nearest intersection of the ray with the marker shell (sphere at the origin)
+    const b = ray.origin.dot(ray.direction);
+    const disc = b * b - (ray.origin.lengthSq() - shellRadius * shellRadius);
+    if (disc < 0) return null;
+    _shellHit.copy(ray.direction).multiplyScalar(-b - Math.sqrt(disc)).add(ray.origin).normalize();
+
+    let best = -1;
+    let bestDot = -1;
+    for (let i = 0; i < minCos.length; i++) {
+        const dot = _shellHit.x * dirs[i * 3] + _shellHit.y * dirs[i * 3 + 1] + _shellHit.z * dirs[i * 3 + 2];
+        if (dot >= minCos[i] && dot > bestDot && (!accept || accept(data[i], i))) {
+            best = i;
+            bestDot = dot;
+        }
+    }
+    return best < 0 ? null : data[best];
+}
+
+let stateLayer = null;  // Track state markers for cleanup
+let countryMarkerIndex = {};  // Country code -> marker index in countryLayer, for hide/show
+
+function clearStateMarkers() {
+    removeMarkerLayer(stateLayer);
+    stateLayer = null;
+}
+
+function hideCountryMarker(countryCode) {
+    const i = countryMarkerIndex[countryCode];
+    if (countryLayer && i !== undefined) {
+        countryLayer.hidden[i] = 1;
+        cullMarkerLayer(countryLayer);
+    }
+}
+
+function showAllCountryMarkers() {
+    if (!countryLayer) return;
+    countryLayer.hidden.fill(0);
+    cullMarkerLayer(countryLayer);
+}
+
+function addStateMarkers(countryCode) {
+    clearStateMarkers();
+    clearCityMarkers();  // Also clear any city markers from previous drill-down
+    if (countryCode !== 'US') return;
+
+    if (usRegions.length === 0) return;
+
+    const markers = [];
+
+    usRegions.forEach(item => {
+        // Normalize state name to code (Cloudflare returns "California", we need "CA")
+        const stateCode = normalizeStateCode(item.region);
+
+        // Position precomputed from MaxMind lat/lon, or the hardcoded state centroid
+        if (item._at < 0) return;
+
+        // Size based on views (log scale) - small for zoomed view
+        const size = 0.4 + (item._logViews / usRegions[LOG_MAX]) * 0.6;  // 0.4-1.0
+
+        markers.push({
+            xyz: REGION_XYZ,
+            at: item._at,
+            size,
+            data: { state: stateCode, stateName: item.region, views: item.views, isState: true }
+        });
+    });
+
+    stateLayer = addMarkerLayer(markers, 0.4);
+}
+
+let cityLayer = null;  // Track city markers for cleanup
+
+function clearCityMarkers() {
+    removeMarkerLayer(cityLayer);
+    cityLayer = null;
+}
+
+function addCityMarkers(countryCode) {
+    clearCityMarkers();
+
+    // Get cities for this country
+    const countryCities = citiesByCountry[countryCode] || [];
+    if (countryCities.length === 0) return;
+
+    const markers = [];
+
+    countryCities.slice(0, 15).forEach(item => {
+        // Position precomputed from MaxMind lat/lon, or the hardcoded fallbacks
+        if (item._at < 0) return;
+
+        // Size based on views (log scale) - small for zoomed view
+        const size = 0.3 + (item._logViews / countryCities[LOG_MAX]) * 0.5;  // 0.3-0.8
+
+        markers.push({
+            xyz: CITY_XYZ,
+            at: item._at,
+            size,
+            data: { city: item.city, region: item.region, views: item.views, isCity: true }
+        });
+    });
+
+    cityLayer = addMarkerLayer(markers, 0.35);
+}
+
+let selectedState = null;  // Track selected state for back navigation
+
+function drillToCountry(code, views) {
+    const at = coordSlot(COUNTRY_LL, code);
+    if (at < 0) return;
+    const lat = COUNTRY_LL.latLon[at];
+    const lon = COUNTRY_LL.latLon[at + 1];
+
+    currentView = 'country';
+    selectedCountry = { code, views, name: COUNTRY_NAMES[code] || code };
+    selectedState = null;
+
+    // Hide the country marker we're drilling into
+    hideCountryMarker(code);
+
+    // For US, show states in detail panel and state markers
+    if (code === 'US') {
+        selectedCountry.regions = usRegions;
+        selectedCountry.isUS = true;
+
+        animateCameraTo(lat, lon, 80, () => addStateMarkers('US'));
+    } else {
+        // For other countries, get cities and show city markers
+        selectedCountry.cities = citiesByCountry[code] || [];
+        selectedCountry.isUS = false;
+
+        animateCameraTo(lat, lon, 100, () => addCityMarkers(code));
+    }
+    updateDetailPanel(selectedCountry);
+}
+
+function drillToState(stateCode, views, stateName) {
+    // stateCode should already be normalized (e.g., "CA")
+    const at = coordSlot(US_STATE_LL, stateCode);
+    if (at < 0) return;
+
+    currentView = 'state';
+    const displayName = stateName || US_STATE_NAMES[stateCode] || stateCode;
+
+    // Get cities for this state (indexed by normalized code, so "CA" and "California" both match)
+    const stateCities = citiesByState[stateCode] || [];
+
+    selectedState = {
+        code: stateCode,
+        name: displayName,
+        views: views,
+        cities: stateCities
+    };
+
+    // Clear state markers, add city markers for this state
+    clearStateMarkers();
+    addStateCityMarkers(stateCode);
+
+    updateDetailPanel(selectedState);
+    animateCameraTo(US_STATE_LL.latLon[at], US_STATE_LL.latLon[at + 1], 60);  // Not too close
+}
+
+function addStateCityMarkers(stateCode) {
+    clearCityMarkers();
+
+    // Get cities for this state - normalize region names
+    const stateCities = citiesByState[stateCode] || [];
+    if (stateCities.length === 0) return;
+
+    const markers = [];
+
+    stateCities.slice(0, 20).forEach(item => {
+        // Position precomputed from MaxMind lat/lon, or an offset from the state center
+        if (item._at < 0) return;
+
+        // Size based on views - small for zoomed view
+        const size = 0.3 + (item._logViews / stateCities[LOG_MAX]) * 0.5;  // 0.3-0.8
+
+        markers.push({
+            xyz: CITY_XYZ,
+            at: item._at,
+            size,
+            data: { city: item.city, region: stateCode, views: item.views, isCity: true }
+        });
+    });
+
+    cityLayer = addMarkerLayer(markers, 0.35);
+}
+
+function goBack() {
+    if (currentView === 'state') {
+        // State → US country view
+        drillToCountry('US', selectedCountry?.views || 0);
+    } else if (currentView === 'country') {
+        // Country → World view
+        animateCameraToWorld();
+    }
+}
+
+function updateDetailPanel(data) {
+    const panel = document.getElementById('detail-panel');
+    const backBtn = document.getElementById('back-btn');
+    if (!panel || !backBtn) return;
+
+    if (data) {
+        let html = `
+            <h3 style="color: var(--accent); margin-bottom: 0.5rem;">${data.name}</h3>
+            <div style="font-size: 2rem; font-weight: 600;">${data.views.toLocaleString()}</div>
+            <div style="color: var(--muted); font-size: 0.875rem;">page views</div>
+        `;
+
+        // Show states for US country view
+        if (data.isUS && data.regions && data.regions.length > 0) {
+            html += `<div style="margin-top: 0.75rem; font-size: 0.75rem; color: var(--muted);">
+                <div style="color: var(--accent); margin-bottom: 0.25rem;">Click a state:</div>`;
+            data.regions.slice(0, 8).forEach(r => {
+                const stateName = US_STATE_NAMES[r.region] || r.region;
+                html += `<div>${stateName}: ${r.views}</div>`;
+            });
+            if (data.regions.length > 8) {
+                html += `<div style="opacity: 0.6;">+ ${data.regions.length - 8} more</div>`;
+            }
+            html += `</div>`;
+        }
+        // Show cities for state view or international country view
+        else if (data.cities && data.cities.length > 0) {
+            html += `<div style="margin-top: 0.75rem; font-size: 0.75rem; color: var(--muted);">`;
+            if (currentView === 'state') {
+                html += `<div style="color: var(--accent); margin-bottom: 0.25rem;">Top cities:</div>`;
+            }
+            data.cities.slice(0, 8).forEach(c => {
+                html += `<div>${c.city}: ${c.views}</div>`;
+            });
+            if (data.cities.length > 8) {
+                html += `<div style="opacity: 0.6;">+ ${data.cities.length - 8} more</div>`;
+            }
+            html += `</div>`;
+        }
+
+        panel.innerHTML = html;
+        panel.style.display = 'block';
+        backBtn.style.display = 'block';
+    } else {
+        panel.style.display = 'none';
+        backBtn.style.display = 'none';
+    }
+}
+
+let starfieldGeometry = null;  // Star positions are generated once and reused
+const STAR_COUNT = 1000;
+
+function createStarfield() {
+    if (!starfieldGeometry) {
+        starfieldGeometry = new THREE.BufferGeometry();
+        const positions = new Float32Array(STAR_COUNT * 3);
+        for (let i = 0; i < STAR_COUNT; i++) {
+            const theta = Math.random() * Math.PI * 2;
+            const phi = Math.acos(2 * Math.random() - 1);
+            const r = 400 + Math.random() * 200;
+            const sinPhi = Math.sin(phi);
+            positions[i * 3] = r * sinPhi * Math.cos(theta);
+            positions[i * 3 + 1] = r * sinPhi * Math.sin(theta);
+            positions[i * 3 + 2] = r * Math.cos(phi);
+        }
+        const attribute = new THREE.BufferAttribute(positions, 3).setUsage(THREE.StaticDrawUsage);
+        starfieldGeometry.setAttribute('position', attribute);
+        // Every star lies within r = 600, so the bounds are known without a scan
+        starfieldGeometry.boundingSphere = new THREE.Sphere(new THREE.Vector3(), 600);
+    }
+    const stars = new THREE.Points(starfieldGeometry, new THREE.PointsMaterial({
+        color: 0xffffff, size: 0.5, transparent: true, opacity: 0.4, depthWrite: false
+    }));
+    // The camera is always inside the star shell, so a frustum test can never cull it;
+    // drawn first, behind everything else
+    stars.frustumCulled = false;
+    stars.renderOrder = -1;
+    return stars;
+}
+
+// Coalesce a high-rate event (mousemove) to at most one handler call per animation
+// frame, always with the latest event
+function throttleToFrame(handler) {
+    let pending = false;
+    let lastEvent = null;
+    return (e) => {
+        lastEvent = e;
+        if (pending) return;
+        pending = true;
+        requestAnimationFrame(() => {
+            pending = false;
+            handler(lastEvent);
+        });
+    };
+}
+
+// Every marker sits on the globeRadius + 1 shell with a radius of at most 4, so a
+// pointer ray that misses this sphere cannot hit any marker
+const MARKER_BOUNDS = new THREE.Sphere(new THREE.Vector3(), CONFIG.globeRadius + 5);
+
+// Data of the marker under the pointer, or null. Drill-down layers only exist in
+// the view they belong to (states in the US view, cities in a country or state
+// view), so checking whichever exist, then countries, follows the current view.
+function hoveredMarker(e, rect) {
+    mouse.set(
+        ((e.clientX - rect.left) / rect.width) * 2 - 1,
+        -((e.clientY - rect.top) / rect.height) * 2 + 1
+    );
+    raycaster.setFromCamera(mouse, camera);
+    if (!raycaster.ray.intersectsSphere(MARKER_BOUNDS)) return null;
+    const hit = nearestHit(stateLayer) || nearestHit(cityLayer) || nearestHit(countryLayer);
+    return hit ? markerDataAt(hit) : null;
+}
+
+function markerTooltipHtml(data) {
+    const views = data.views.toLocaleString();
+    if (data.isState) {
+        const name = data.stateName || US_STATE_NAMES[data.state] || data.state;
+        return `<strong style="color:var(--accent)">${name}</strong><br>${views} views<br><small style="color:var(--muted)">Click for cities</small>`;
+    }
+    if (data.isCity) {
+        const cityName = data.city || 'Unknown';
+        const regionName = data.region ? ` (${US_STATE_NAMES[data.region] || data.region})` : '';
+        return `<strong style="color:var(--accent)">${cityName}</strong>${regionName}<br>${views} views`;
+    }
+    const name = COUNTRY_NAMES[data.country] || data.country;
+    const hint = data.country === 'US' ? 'Click for states' : 'Click to zoom';
+    return `<strong style="color:var(--accent)">${name}</strong><br>${views} views<br><small style="color:var(--muted)">${hint}</small>`;
+}
+
+function handleGlobeClick(event) {
+    if (isAnimating) return;
+
+    const rect = renderer.domElement.getBoundingClientRect();
+    mouse.set(
+        ((event.clientX - rect.left) / rect.width) * 2 - 1,
+        -((event.clientY - rect.top) / rect.height) * 2 + 1
+    );
+    raycaster.setFromCamera(mouse, camera);
+
+    // Check state markers first (if we're in US view)
+    if (currentView === 'country' && selectedCountry && selectedCountry.code === 'US') {
+        const data = pickMarker(stateLayer?.hitIndex, raycaster.ray);
+        if (data && data.isState && data.state && data.views) {
+            drillToState(data.state, data.views, data.stateName);
+            return;
+        }
+    }
+
+    // Check country markers (skip the hidden one we've drilled into)
+    const data = pickMarker(countryLayer?.hitIndex, raycaster.ray, (d, i) => !countryLayer.hidden[i]);
+    if (data && data.country && data.views) {
+        drillToCountry(data.country, data.views);
+    }
+}
+
+function initGlobe() {
+    const container = document.getElementById('globe-container');
+    if (!container) return;
+
+    // Create tooltip
+    tooltip = document.getElementById('globe-tooltip');
+
+    // Scene
+    scene = new THREE.Scene();
+    scene.background = new THREE.Color(CONFIG.backgroundColor);
+
+    // Camera
+    camera = new THREE.PerspectiveCamera(45, container.clientWidth / container.clientHeight, 1, 1000);
+    camera.position.z = 280;
+
+    // Renderer
+    renderer = new THREE.WebGLRenderer({ antialias: true });
+    // The globe is fill-rate bound, so high-DPI screens are capped at 1.5x inline
+    // (raised to 2x in the fullscreen modal)
+    renderer.setPixelRatio(Math.min(window.devicePixelRatio, 1.5));
+    renderer.setSize(container.clientWidth, container.clientHeight);
+    container.appendChild(renderer.domElement);
+    glowTexture = createGlowTexture();
+
+    // Controls
+    controls = new OrbitControls(camera, renderer.domElement);
+    controls.enableDamping = true;
+    controls.dampingFactor = 0.05;
+    controls.minDistance = 150;
+    controls.maxDistance = 400;
+    controls.enablePan = false;
+    controls.autoRotate = true;
+    controls.autoRotateSpeed = 0.3;
+    controls.addEventListener('change', requestRender);
+    controls.addEventListener('change', cullMarkerLayers);
+
+    // Starfield
+    scene.add(createStarfield());
+
+    // Globe group (everything rotates together)
+    globeGroup = new THREE.Group();
+
+    // Ocean sphere
+    const oceanGeo = new THREE.SphereGeometry(CONFIG.globeRadius - 0.5, 64, 64);
+    globeGroup.add(new THREE.Mesh(oceanGeo, OCEAN_MAT));
+
+    // Atmosphere
+    const atmosphereGeo = new THREE.SphereGeometry(CONFIG.globeRadius + 2, 64, 64);
+    globeGroup.add(new THREE.Mesh(atmosphereGeo, ATMOSPHERE_MAT));
+
+    scene.add(globeGroup);
+
+    // Load country borders. Fetching, parsing and building the vertex buffer run
+    // in a worker; only the finished buffer comes back.
+    const borderWorker = new Worker(PAGE_DATA.borderWorker);
+    borderWorker.onmessage = (e) => {
+        borderWorker.terminate();
+        if (e.data.error) {
+            console.warn('Failed to load country borders:', e.data.error);
+            return;
+        }
+        const geometry = new THREE.BufferGeometry();
+        geometry.setAttribute('position', new THREE.BufferAttribute(e.data.positions, 3));
+        globeGroup.add(new THREE.LineSegments(geometry, BORDER_MAT));
+        requestRender();
+    };
+    borderWorker.postMessage({ url: CONFIG.countriesUrl, radius: CONFIG.globeRadius + 0.2 });
+
+    // Add visitor markers, sized on a log scale: 1 + log10(views + 1) * sizeScale
+    let maxViews = 1;
+    for (const item of globeData) if (item.views > maxViews) maxViews = item.views;
+    const sizeScale = 3 / Math.log10(maxViews + 1);
+    const countryMarkers = [];
+
+    globeData.forEach(item => {
+        if (item._at < 0) return;
+
+        const size = 1 + Math.log10(item.views + 1) * sizeScale;
+
+        // Track country markers for hide/show during drill-down
+        countryMarkerIndex[item.country] = countryMarkers.length;
+        countryMarkers.push({
+            xyz: GLOBE_XYZ,
+            at: item._at,
+            size,
+            data: { country: item.country, views: item.views }
+        });
+    });
+    countryLayer = addMarkerLayer(countryMarkers, 0.5, COUNTRY_MARKER_MAT, 6);
+
+    // Click to drill down
+    renderer.domElement.addEventListener('click', handleGlobeClick);
+
+    // Back button - uses hierarchical navigation
+    const backBtn = document.getElementById('back-btn');
+    if (backBtn) {
+        backBtn.addEventListener('click', goBack);
+    }
+
+    // Escape key to go back or close modal
+    document.addEventListener('keydown', (e) => {
+        if (e.key === 'Escape') {
+            const modal = document.getElementById('globe-modal');
+            if (modal && modal.classList.contains('active')) {
+                closeFullscreenModal();
+            } else if (currentView !== 'world') {
+                goBack();
+            }
+        }
+    });
+
+    // Fullscreen modal handlers - moves the actual globe instead of cloning
+    const fullscreenBtn = document.getElementById('fullscreen-btn');
+    const modal = document.getElementById('globe-modal');
+    const modalCloseBtn = document.getElementById('modal-close-btn');
+    const modalBackBtn = document.getElementById('modal-back-btn');
+    const modalContainer = document.getElementById('modal-globe-container');
+    const modalDetailPanel = document.getElementById('modal-detail-panel');
+    const modalTooltip = document.getElementById('modal-tooltip');
+
+    // Size the renderer and camera to whichever container holds the canvas
+    function resizeRenderer() {
+        const width = isFullscreen ? window.innerWidth : container.clientWidth;
+        const height = isFullscreen ? window.innerHeight : container.clientHeight;
+        renderer.setSize(width, height);
+        camera.aspect = width / height;
+        camera.updateProjectionMatrix();
+        requestRender();
+    }
+
+    // Window and container resizes fire repeatedly while dragging; each one
+    // reallocates the drawing buffer, so they are coalesced to one per frame
+    let resizePending = false;
+    function scheduleResize() {
+        if (resizePending) return;
+        resizePending = true;
+        requestAnimationFrame(() => {
+            resizePending = false;
+            resizeRenderer();
+        });
+    }
+
+    function openFullscreenModal() {
+        if (!modal || !modalContainer) return;
+
+        isFullscreen = true;
+        originalContainer = container;
+        modal.classList.add('active');
+        if (tooltip) tooltip.style.display = 'none';  // Hover now targets the modal tooltip
+
+        // Move the canvas to fullscreen container
+        modalContainer.appendChild(renderer.domElement);
+
+        // Update renderer size
+        renderer.setPixelRatio(Math.min(window.devicePixelRatio, 2));
+        resizeRenderer();
+
+        // Update controls constraints for larger view
+        controls.minDistance = 130;
+        controls.maxDistance = 500;
+
+        // Sync detail panel
+        syncDetailPanel();
+    }
+
+    function closeFullscreenModal() {
+        if (!modal || !originalContainer) return;
+
+        isFullscreen = false;
+        modal.classList.remove('active');
+
+        // Move canvas back to original container
+        originalContainer.appendChild(renderer.domElement);
+
+        // Update renderer size
+        renderer.setPixelRatio(Math.min(window.devicePixelRatio, 1.5));
+        resizeRenderer();
+
+        // Restore controls constraints
+        controls.minDistance = 150;
+        controls.maxDistance = 400;
+
+        // Hide modal panels
+        if (modalDetailPanel) modalDetailPanel.style.display = 'none';
+        if (modalTooltip) modalTooltip.style.display = 'none';
+    }
+
+    function syncDetailPanel() {
+        // Sync the detail panel content to modal
+        const panel = document.getElementById('detail-panel');
+        if (panel && modalDetailPanel) {
+            modalDetailPanel.innerHTML = panel.innerHTML;
+            modalDetailPanel.style.display = panel.style.display;
+        }
+
+        // Update modal back button visibility
+        if (modalBackBtn) {
+            modalBackBtn.style.display = currentView !== 'world' ? 'block' : 'none';
+        }
+    }
+
+    // Override updateDetailPanel to sync both panels
+    const originalUpdateDetailPanel = updateDetailPanel;
+    updateDetailPanel = function(data) {
+        originalUpdateDetailPanel(data);
+        if (isFullscreen) {
+            syncDetailPanel();
+        }
+    };
+
+    // Handle window resize (sizes the fullscreen modal)
+    window.addEventListener('resize', scheduleResize);
+
+    // Hover tooltip: the inline tooltip is positioned within the globe container,
+    // the fullscreen one within the viewport
+    renderer.domElement.addEventListener('mousemove', throttleToFrame((e) => {
+        const tip = isFullscreen ? modalTooltip : tooltip;
+        if (!tip) return;
+
+        const rect = renderer.domElement.getBoundingClientRect();
+        const data = hoveredMarker(e, rect);
+        if (data) {
+            tip.innerHTML = markerTooltipHtml(data);
+            tip.style.display = 'block';
+            tip.style.left = (e.clientX - (isFullscreen ? 0 : rect.left) + 15) + 'px';
+            tip.style.top = (e.clientY - (isFullscreen ? 0 : rect.top) + 15) + 'px';
+            renderer.domElement.style.cursor = 'pointer';
+        } else {
+            tip.style.display = 'none';
+            renderer.domElement.style.cursor = 'grab';
+        }
+    }));
+
+    if (fullscreenBtn) {
+        fullscreenBtn.addEventListener('click', openFullscreenModal);
+    }
+
+    if (modalCloseBtn) {
+        modalCloseBtn.addEventListener('click', closeFullscreenModal);
+    }
+
+    if (modalBackBtn) {
+        modalBackBtn.addEventListener('click', goBack);
+    }
+
+    // Handle container resize (sizes the inline globe)
+    new ResizeObserver(scheduleResize).observe(container);
+
+    // The inline globe is idle while scrolled out of view (the browser already stops
+    // requestAnimationFrame in hidden tabs); it picks up where it left off on return
+    let inView = true;
+    new IntersectionObserver(entries => {
+        inView = entries[entries.length - 1].isIntersecting;
+        if (inView) requestRender();
+    }).observe(container);
+
+    // Animation loop. controls.update() emits 'change' whenever the camera moved
+    // (auto-rotation, damping, camera animations), so a still globe isn't redrawn.
+    function animate() {
+        requestAnimationFrame(animate);
+        if (!inView && !isFullscreen) return;
+        stepCameraAnimation();
+        controls.update();
+        if (!needsRender) return;
+        needsRender = false;
+        glowHalfHeight.value = renderer.domElement.height / 2;
+        renderer.render(scene, camera);
+    }
+    animate();
+}
+
+// Initialize when DOM is ready
+if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', initGlobe);
+} else {
+    initGlobe();
+}
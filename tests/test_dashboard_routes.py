@@ -0,0 +1,448 @@
+"""Tests for the globe dashboard router in routes.py."""
+
+import asyncio
+import base64
+import importlib.util
+import math
+import re
+import struct
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import analytics_941
+from analytics_941.models import DashboardData
+
+# The routes/ package shadows routes.py, so the module is loaded from its file
+_spec = importlib.util.spec_from_file_location(
+    "analytics_941._dashboard_routes", Path(analytics_941.__file__).parent / "routes.py"
+)
+dashboard_routes = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = dashboard_routes
+_spec.loader.exec_module(dashboard_routes)
+
+
+def run_async(coro):
+    """Helper to run async functions in sync tests."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+def _make_app(client=None, **kwargs) -> FastAPI:
+    """App with the dashboard router mounted at /analytics."""
+    app = FastAPI()
+    router = dashboard_routes.create_dashboard_router(client or AsyncMock(), "test.com", **kwargs)
+    app.include_router(router, prefix="/analytics")
+    return app
+
+
+class TestLoginPage:
+    """Test the login page."""
+
+    def _get_client(self):
+        app = _make_app(passkey="secret", rp_id="localhost", rp_origin="http://localhost")
+        return TestClient(app, follow_redirects=False)
+
+    def test_error_is_escaped(self):
+        """The error query parameter is HTML-escaped, not reflected as markup."""
+        response = self._get_client().get("/analytics/login", params={"error": "<b>"})
+        assert response.status_code == 200
+        assert "&lt;b&gt;" in response.text
+        assert "<b>" not in response.text
+
+    def test_error_free_pages_are_prerendered(self, monkeypatch):
+        """Both error-free variants are served byte-for-byte from the startup render."""
+        client = self._get_client()
+        expected = {
+            setup: client.get("/analytics/login", params={"setup": setup}).content
+            for setup in ("", "1")
+        }
+        assert expected[""] != expected["1"]
+
+        # Requests without an error must not render the template again
+        template = MagicMock()
+        template.render.side_effect = AssertionError("login page re-rendered")
+        monkeypatch.setattr(dashboard_routes, "_LOGIN_TEMPLATE", template)
+        for setup, body in expected.items():
+            response = client.get("/analytics/login", params={"setup": setup})
+            assert response.status_code == 200
+            assert response.content == body
+
+    def test_redirects_without_passkey(self):
+        """Without a passkey the login page redirects to the dashboard."""
+        client = TestClient(_make_app(), follow_redirects=False)
+        response = client.get("/analytics/login")
+        assert response.status_code == 302
+        assert response.headers["location"] == "./"
+
+
+class TestApiAuth:
+    """Test the JSON and HTMX endpoints reject requests without a valid cookie."""
+
+    def _get_client(self):
+        self.backend = AsyncMock()
+        return TestClient(_make_app(self.backend, passkey="secret"))
+
+    def test_stats_unauthorized(self):
+        """/api/stats answers 401 with a JSON error body."""
+        response = self._get_client().get("/analytics/api/stats")
+        assert response.status_code == 401
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == {"error": "unauthorized"}
+        self.backend.get_dashboard_data.assert_not_called()
+
+    def test_realtime_unauthorized(self):
+        """/api/realtime answers 401 with a placeholder fragment."""
+        response = self._get_client().get("/analytics/api/realtime")
+        assert response.status_code == 401
+        assert response.text == "<span>-</span>"
+        self.backend.get_realtime_count.assert_not_called()
+
+    def test_stats_with_cookie(self):
+        """A valid auth cookie is accepted."""
+        client = self._get_client()
+        self.backend.get_dashboard_data.return_value = DashboardData(site="test.com", period="7d")
+        cookie = dashboard_routes._hash_passkey("secret", "test.com")
+        client.cookies.set(dashboard_routes.AUTH_COOKIE_NAME, cookie)
+        response = client.get("/analytics/api/stats")
+        assert response.status_code == 200
+        assert response.json()["site"] == "test.com"
+
+
+def _unpack_geo_rows(blob: str, string_fields: tuple[str, ...]) -> list[dict]:
+    """Decode a _pack_geo_rows blob the way decodeGeoRows does in globe.js."""
+    data = base64.b64decode(blob)
+    n, str_len = struct.unpack_from("<2I", data)
+    strings = data[8 : 8 + str_len].decode().split("\0")
+    offset = 8 + -(-str_len // 4) * 4
+    assert offset % 4 == 0  # Float32Array/Uint32Array views need 4-byte alignment
+    lat = struct.unpack_from(f"<{n}f", data, offset)
+    lon = struct.unpack_from(f"<{n}f", data, offset + 4 * n)
+    views = struct.unpack_from(f"<{n}I", data, offset + 8 * n)
+    indexes = struct.unpack_from(f"<{n * len(string_fields)}H", data, offset + 12 * n)
+    assert len(data) == offset + 12 * n + 2 * n * len(string_fields)
+    return [
+        {
+            "lat": lat[i],
+            "lon": lon[i],
+            "views": views[i],
+            **{f: strings[indexes[k * n + i]] for k, f in enumerate(string_fields)},
+        }
+        for i in range(n)
+    ]
+
+
+class TestPackGeoRows:
+    """Test the packed region/city format shared with globe.js."""
+
+    def test_zero_rows(self):
+        """No rows packs to just the header."""
+        blob = dashboard_routes._pack_geo_rows([], ("country", "region"))
+        assert base64.b64decode(blob) == struct.pack("<2I", 0, 0)
+        assert _unpack_geo_rows(blob, ("country", "region")) == []
+
+    def test_round_trip(self):
+        """Coordinates, views and strings survive packing."""
+        rows = [
+            {
+                "country": "US",
+                "region": "CA",
+                "city": "Los Angeles",
+                "views": 7,
+                "lat": 34.0,
+                "lon": -118.25,
+            },
+            {
+                "country": "US",
+                "region": "NY",
+                "city": "New York",
+                "views": 70000,
+                "lat": 40.5,
+                "lon": -74.0,
+            },
+        ]
+        unpacked = _unpack_geo_rows(
+            dashboard_routes._pack_geo_rows(rows, ("country", "region", "city")),
+            ("country", "region", "city"),
+        )
+        assert unpacked == rows
+
+    def test_missing_coordinates_are_nan(self):
+        """None or absent lat/lon pack as NaN."""
+        rows = [
+            {"country": "DE", "views": 1, "lat": None, "lon": None},
+            {"country": "FR", "views": 2},
+        ]
+        unpacked = _unpack_geo_rows(
+            dashboard_routes._pack_geo_rows(rows, ("country",)), ("country",)
+        )
+        assert all(math.isnan(r["lat"]) and math.isnan(r["lon"]) for r in unpacked)
+
+    def test_missing_strings_are_empty(self):
+        """None or absent string fields pack as ""."""
+        rows = [
+            {"country": "US", "region": None, "views": 1},
+            {"country": "US", "views": 2},
+        ]
+        unpacked = _unpack_geo_rows(
+            dashboard_routes._pack_geo_rows(rows, ("country", "region")), ("country", "region")
+        )
+        assert [r["region"] for r in unpacked] == ["", ""]
+
+    def test_non_ascii_strings(self):
+        """Names are UTF-8 in the string table."""
+        rows = [
+            {"country": "DE", "region": "Baden-Württemberg", "city": "Köln", "views": 3},
+            {"country": "JP", "region": "東京都", "city": "東京", "views": 4},
+        ]
+        fields = ("country", "region", "city")
+        unpacked = _unpack_geo_rows(dashboard_routes._pack_geo_rows(rows, fields), fields)
+        assert [(r["region"], r["city"]) for r in unpacked] == [
+            ("Baden-Württemberg", "Köln"),
+            ("東京都", "東京"),
+        ]
+
+    def test_string_index_limit(self):
+        """Every u16 index is usable; one more distinct string raises ValueError."""
+        rows = [{"city": f"c{i}", "views": 1} for i in range(0x10000)]
+        unpacked = _unpack_geo_rows(dashboard_routes._pack_geo_rows(rows, ("city",)), ("city",))
+        assert unpacked[-1]["city"] == "c65535"
+
+        rows.append({"city": "one too many", "views": 1})
+        with pytest.raises(ValueError, match="u16"):
+            dashboard_routes._pack_geo_rows(rows, ("city",))
+
+
+class TestDashboardDataCache:
+    """Test dashboard data is fetched once per period and TTL, shared by page and API."""
+
+    def _get_backend(self):
+        self.calls = 0
+
+        async def get_dashboard_data(period):
+            self.calls += 1
+            await asyncio.sleep(0.01)  # Keep the query in flight while others arrive
+            return DashboardData(site="test.com", period=period, total_views=self.calls)
+
+        backend = AsyncMock()
+        backend.get_dashboard_data.side_effect = get_dashboard_data
+        return backend
+
+    def test_concurrent_requests_share_one_query(self):
+        """Page loads and stats polls arriving together wait on the same query."""
+        transport = httpx.ASGITransport(app=_make_app(self._get_backend()))
+
+        async def load():
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(
+                    *(client.get("/analytics/", params={"period": "7d"}) for _ in range(5)),
+                    *(
+                        client.get("/analytics/api/stats", params={"period": "7d"})
+                        for _ in range(5)
+                    ),
+                )
+
+        responses = run_async(load())
+        assert [r.status_code for r in responses] == [200] * 10
+        assert self.calls == 1
+
+    def test_refetches_after_ttl(self, monkeypatch):
+        """Data older than DASHBOARD_CACHE_TTL is fetched again."""
+        now = [1000.0]
+        monkeypatch.setattr(dashboard_routes, "time", SimpleNamespace(monotonic=lambda: now[0]))
+        client = TestClient(_make_app(self._get_backend()))
+
+        assert client.get("/analytics/api/stats").json()["total_views"] == 1
+        now[0] += dashboard_routes.DASHBOARD_CACHE_TTL - 1
+        assert client.get("/analytics/api/stats").json()["total_views"] == 1
+        now[0] += 1
+        assert client.get("/analytics/api/stats").json()["total_views"] == 2
+        assert self.calls == 2
+
+    def test_failures_are_not_cached(self):
+        """A failed query shows the error page and the next request retries."""
+        backend = self._get_backend()
+        backend.get_dashboard_data.side_effect = [
+            RuntimeError("D1 unavailable"),
+            DashboardData(site="test.com", period="7d"),
+        ]
+        client = TestClient(_make_app(backend))
+
+        failed = client.get("/analytics/")
+        assert failed.status_code == 500
+        assert "D1 unavailable" in failed.text
+        assert client.get("/analytics/").status_code == 200
+        assert backend.get_dashboard_data.call_count == 2
+
+    def test_unknown_periods_are_not_cached(self):
+        """Only the known periods are stored; anything else is fetched every time."""
+        client = TestClient(_make_app(self._get_backend()))
+        for _ in range(2):
+            client.get("/analytics/api/stats", params={"period": "7d"})
+        assert self.calls == 1
+        for _ in range(2):
+            client.get("/analytics/api/stats", params={"period": "1y"})
+        assert self.calls == 3
+
+
+class TestVerifyAuth:
+    """Test the passkey cookie check."""
+
+    EXPECTED = dashboard_routes._hash_passkey("secret", "test.com").encode()
+
+    def test_matching_cookie(self):
+        assert dashboard_routes._verify_auth(self.EXPECTED.decode(), self.EXPECTED) is True
+
+    def test_missing_or_empty_cookie(self):
+        assert dashboard_routes._verify_auth(None, self.EXPECTED) is False
+        assert dashboard_routes._verify_auth("", self.EXPECTED) is False
+
+    def test_wrong_length_cookie(self):
+        assert dashboard_routes._verify_auth(self.EXPECTED.decode()[:-1], self.EXPECTED) is False
+        assert dashboard_routes._verify_auth("a" * 1_000_000, self.EXPECTED) is False
+
+    def test_wrong_cookie_of_same_length(self):
+        assert dashboard_routes._verify_auth("0" * 64, self.EXPECTED) is False
+
+    def test_non_ascii_cookie_does_not_raise(self):
+        """compare_digest raises TypeError on non-ASCII str; bytes comparison does not."""
+        assert dashboard_routes._verify_auth("é" * 64, self.EXPECTED) is False
+
+
+class TestPageResponse:
+    """Test dashboard page revalidation and compression."""
+
+    def _get_client(self):
+        backend = AsyncMock()
+        backend.get_dashboard_data.return_value = DashboardData(site="test.com", period="7d")
+        return TestClient(_make_app(backend))
+
+    def test_unchanged_page_is_304(self):
+        """A matching If-None-Match gets an empty 304 with the same ETag."""
+        client = self._get_client()
+        first = client.get("/analytics/")
+        etag = first.headers["etag"]
+        response = client.get("/analytics/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert client.get("/analytics/", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    def test_gzip_and_identity(self):
+        """Gzip is sent only when accepted; both carry Vary: Accept-Encoding."""
+        client = self._get_client()
+        plain = client.get("/analytics/", headers={"Accept-Encoding": "identity"})
+        gzipped = client.get("/analytics/", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in plain.headers
+        assert gzipped.headers["content-encoding"] == "gzip"
+        assert gzipped.content == plain.content  # httpx decodes the gzipped body
+        assert plain.headers["vary"] == gzipped.headers["vary"] == "Accept-Encoding"
+        assert plain.headers["etag"] != gzipped.headers["etag"]
+        assert gzipped.headers["etag"] == plain.headers["etag"][:-1] + '-gz"'
+
+    def test_etag_matches_only_its_own_encoding(self):
+        """A validator for one encoding never revalidates the other."""
+        client = self._get_client()
+        plain_tag = client.get("/analytics/", headers={"Accept-Encoding": "identity"}).headers[
+            "etag"
+        ]
+        gzip_tag = client.get("/analytics/", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+        for accept, own, other in (
+            ("identity", plain_tag, gzip_tag),
+            ("gzip", gzip_tag, plain_tag),
+        ):
+            headers = {"Accept-Encoding": accept}
+            assert (
+                client.get("/analytics/", headers={**headers, "If-None-Match": own}).status_code
+                == 304
+            )
+            response = client.get("/analytics/", headers={**headers, "If-None-Match": other})
+            assert response.status_code == 200
+            assert response.headers["etag"] == own
+
+    def test_if_none_match_list_and_weak_tags(self):
+        """If-None-Match may list several tags, and weak comparison applies."""
+        client = self._get_client()
+        headers = {"Accept-Encoding": "gzip"}
+        etag = client.get("/analytics/", headers=headers).headers["etag"]
+        for if_none_match in (f'"stale", {etag}', f"W/{etag}"):
+            response = client.get(
+                "/analytics/", headers={**headers, "If-None-Match": if_none_match}
+            )
+            assert response.status_code == 304
+
+    def test_gzip_refused_with_q0(self):
+        """gzip;q=0 means the client does not accept gzip."""
+        response = self._get_client().get("/analytics/", headers={"Accept-Encoding": "gzip;q=0"})
+        assert "content-encoding" not in response.headers
+
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [
+            ("", False),
+            ("gzip", True),
+            ("GZIP", True),
+            ("deflate, gzip;q=0.5", True),
+            ("gzip;q=0", False),
+            ("gzip; q=0.000", False),
+            ("gzip;q=bogus", False),
+            ("br, *", True),
+            ("*;q=0", False),
+            ("gzip;q=0, *", False),
+            ("identity", False),
+        ],
+    )
+    def test_accepts_gzip(self, header, expected):
+        assert dashboard_routes._accepts_gzip(header) is expected
+
+
+def _asset_urls(page: str, pattern: str) -> list[str]:
+    """Every quoted ./static/... URL in the page whose path matches pattern."""
+    return re.findall(rf"""['"](\./static/{pattern}[^'"]*)['"]""", page)
+
+
+class TestDashboardUrls:
+    """Test the page's relative URLs resolve under the mount prefix."""
+
+    def _get_client(self):
+        backend = AsyncMock()
+        backend.get_dashboard_data.return_value = DashboardData(site="test.com", period="7d")
+        return TestClient(_make_app(backend), follow_redirects=False)
+
+    def test_slashless_path_redirects(self):
+        """The prefix without a trailing slash redirects to it, keeping the query."""
+        response = self._get_client().get("/analytics", params={"period": "30d"})
+        assert response.status_code == 302
+        assert response.headers["location"] == "/analytics/?period=30d"
+
+    def test_stylesheet_resolves_under_prefix(self):
+        """Following the slashless URL, the CSS href resolves to a served stylesheet."""
+        client = self._get_client()
+        client.follow_redirects = True
+        response = client.get("/analytics")
+        hrefs = _asset_urls(response.text, r"css/")
+        assert hrefs
+        for href in hrefs:
+            url = urljoin(str(response.url), href)
+            assert urlsplit(url).path.startswith("/analytics/static/css/")
+            assert client.get(url).status_code == 200
+
+    def test_scripts_resolve_under_prefix(self):
+        """The globe module, its importmap entry and the border worker resolve and load."""
+        client = self._get_client()
+        client.follow_redirects = True
+        response = client.get("/analytics")
+        srcs = set(_asset_urls(response.text, r"js/"))
+        for name in ("globe.js", "globe-constants.js", "border-worker.js"):
+            assert any(f"/{name}?v=" in src for src in srcs), name
+        for src in srcs:
+            url = urljoin(str(response.url), src)
+            assert urlsplit(url).path.startswith("/analytics/static/js/")
+            assert client.get(url).status_code == 200